@@ -1,7 +1,33 @@
 import asyncio
 import websockets
 import json
-import pprint
+import argparse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib codec
+    orjson = None
+
+# JSON codec used on the wire; dumps() always returns bytes.
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+
+    def dumps_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+else:
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+    def dumps_pretty(obj):
+        return json.dumps(obj, indent=2)
+
+try:
+    from uvloop import run as run_event_loop
+except ImportError:  # uvloop is not available on Windows; use the stock asyncio loop
+    from asyncio import run as run_event_loop
 
 # --- MCP Client Implementation ---
 # This client connects to the MCP server, performs handshake, lists capabilities, and invokes a tool and resource.
@@ -19,139 +45,169 @@ class Colors:
     END = '\033[0m'
 
 def print_section(title, content):
-    """Print a formatted section with title and JSON content"""
-    print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.END}")
-    print(f"{Colors.BLUE}{Colors.BOLD}{title}{Colors.END}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{'-'*80}{Colors.END}")
+    """Print a formatted section with title and already-decoded JSON content"""
+    # Build the whole section first so it goes out in a single write
+    print(
+        f"\n{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.END}\n"
+        f"{Colors.BLUE}{Colors.BOLD}{title}{Colors.END}\n"
+        f"{Colors.HEADER}{Colors.BOLD}{'-'*80}{Colors.END}\n"
+        f"{Colors.CYAN}{dumps_pretty(content)}{Colors.END}"
+    )
+
+async def send_json(websocket, obj):
+    """Encode obj once and send it; the bytes from dumps() go out without a str round trip"""
+    await websocket.send(dumps(obj))
+
+class MCPSession:
+    """A reusable connection to an MCP server: connect once, make any number of calls, close on shutdown"""
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.websocket = None
+        self.next_id = 0
+
+    async def connect(self):
+        if self.websocket is None:
+            # Messages are small JSON-RPC frames, so skip permessage-deflate
+            self.websocket = await websockets.connect(self.uri, compression=None)
+
+    async def send(self, request):
+        """Send one JSON-RPC request and return the decoded response"""
+        await send_json(self.websocket, request)
+        return loads(await self.websocket.recv(decode=False))
+
+    def request(self, method, params=None):
+        """Build a JSON-RPC request for method with the session's next free id"""
+        self.next_id += 1
+        request = {"jsonrpc": "2.0", "id": self.next_id, "method": method}
+        if params is not None:
+            request["params"] = params
+        return request
+
+    async def send_batch(self, requests):
+        """Send several JSON-RPC requests as one batch frame and return the responses in request order"""
+        await send_json(self.websocket, requests)
+        responses = loads(await self.websocket.recv(decode=False))
+        # The server may answer a batch in any order, so match responses back up by id
+        by_id = {response.get("id"): response for response in responses}
+        return [by_id.get(request["id"], {}) for request in requests]
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+            self.websocket = None
+
+# Open sessions keyed by server URI, so repeated runs in one process share a connection
+_SESSIONS: dict = {}
+_SESSIONS_LOCK = asyncio.Lock()
+
+async def get_session(uri):
+    """Return the shared session for uri, connecting it on first use"""
+    async with _SESSIONS_LOCK:
+        session = _SESSIONS.get(uri)
+        if session is None:
+            session = MCPSession(uri)
+            await session.connect()
+            _SESSIONS[uri] = session
+        return session
+
+async def close_sessions():
+    async with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            await session.close()
+        _SESSIONS.clear()
+
+async def mcp_client(session):
+    """Run the demo workflow over an already-open session"""
+    # 1. Send initialize handshake
+    initialize_req = session.request("initialize", {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {}  # client capabilities (empty for now)
+    })
+    print_section("SENDING: Initialize Request", initialize_req)
+    capabilities = await session.send(initialize_req)
+    print_section("RECEIVED: Server Capabilities", capabilities)
+    
+    # Extract server capabilities for demonstration
+    if "result" in capabilities:
+        server_name = capabilities["result"]["serverInfo"]["name"]
+        print(f"{Colors.GREEN}✓ Connected to {Colors.BOLD}{server_name}{Colors.END}")
+        
+        # Show what the server can do
+        print(f"\n{Colors.YELLOW}Server supports:{Colors.END}")
+        for cap, enabled in capabilities["result"]["capabilities"].items():
+            if enabled:  # If not empty
+                print(f"{Colors.GREEN}  ✓ {cap}{Colors.END}")
+
+    # 2. Discover tools, resources and prompts in a single batch frame
+    discovery_reqs = [
+        session.request("tools/list"),
+        session.request("resources/list"),
+        session.request("prompts/list")
+    ]
+    print_section("SENDING: Discovery Batch Request", discovery_reqs)
+    tools_data, resources_data, prompts_data = await session.send_batch(discovery_reqs)
+
+    print_section("RECEIVED: Available Tools", tools_data)
     
-    if isinstance(content, str):
-        # Parse JSON string to dict
-        try:
-            parsed = json.loads(content)
-            pretty_json = json.dumps(parsed, indent=2)
-            print(f"{Colors.CYAN}{pretty_json}{Colors.END}")
-        except:
-            print(f"{Colors.YELLOW}{content}{Colors.END}")
-    else:
-        # Already a dict or other object
-        pretty = pprint.pformat(content, indent=2)
-        print(f"{Colors.CYAN}{pretty}{Colors.END}")
-
-async def mcp_client():
+    # Extract tool info for demonstration
+    if "result" in tools_data and len(tools_data["result"]) > 0:
+        print(f"\n{Colors.YELLOW}Available tools:{Colors.END}")
+        for tool in tools_data["result"]:
+            print(f"{Colors.GREEN}  ➤ {Colors.BOLD}{tool['name']}{Colors.END}: {tool['description']}")
+
+    print_section("RECEIVED: Available Resources", resources_data)
+    
+    # Extract resources for demonstration
+    if "result" in resources_data and len(resources_data["result"]) > 0:
+        print(f"\n{Colors.YELLOW}Available resources:{Colors.END}")
+        for resource in resources_data["result"]:
+            print(f"{Colors.GREEN}  ➤ {Colors.BOLD}{resource['name']}{Colors.END} ({resource['uri']})")
+
+    print_section("RECEIVED: Available Prompts", prompts_data)
+
+    # 3. Call add_numbers tool
+    tools_call_req = session.request("tools/call", {
+        "name": "add_numbers",
+        "arguments": {"a": 5, "b": 7}
+    })
+    print_section("SENDING: Tool Call Request", tools_call_req)
+    result_data = await session.send(tools_call_req)
+    print_section("RECEIVED: Tool Call Result", result_data)
+    
+    # Extract result for demonstration
+    if "result" in result_data:
+        print(f"\n{Colors.YELLOW}Result of add_numbers(5, 7):{Colors.END}")
+        print(f"{Colors.GREEN}  = {Colors.BOLD}{result_data['result'].get('sum')}{Colors.END}")
+
+    # 4. Read example resource
+    resources_read_req = session.request("resources/read", {"uris": ["file:///example.txt"]})
+    print_section("SENDING: Resource Read Request", resources_read_req)
+    content_data = await session.send(resources_read_req)
+    print_section("RECEIVED: Resource Content", content_data)
+    
+    # Extract content for demonstration
+    if "result" in content_data and "contents" in content_data["result"]:
+        for content in content_data["result"]["contents"]:
+            print(f"\n{Colors.YELLOW}Content of {content['uri']}:{Colors.END}")
+            print(f"{Colors.GREEN}  {Colors.BOLD}{content['text']}{Colors.END}")
+    
+    print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.END}")
+    print(f"{Colors.GREEN}{Colors.BOLD}MCP Demo Complete!{Colors.END}")
+
+async def main(runs):
     uri = "ws://localhost:8765"
     print(f"{Colors.GREEN}{Colors.BOLD}Connecting to MCP server at {uri}...{Colors.END}")
-    
-    async with websockets.connect(uri) as websocket:
-        # 1. Send initialize handshake
-        initialize_req = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {}  # client capabilities (empty for now)
-            }
-        }
-        print_section("SENDING: Initialize Request", initialize_req)
-        await websocket.send(json.dumps(initialize_req))
-        
-        response = await websocket.recv()
-        print_section("RECEIVED: Server Capabilities", response)
-        
-        # Extract server capabilities for demonstration
-        capabilities = json.loads(response)
-        if "result" in capabilities:
-            server_name = capabilities["result"]["serverInfo"]["name"]
-            print(f"{Colors.GREEN}✓ Connected to {Colors.BOLD}{server_name}{Colors.END}")
-            
-            # Show what the server can do
-            print(f"\n{Colors.YELLOW}Server supports:{Colors.END}")
-            for cap, enabled in capabilities["result"]["capabilities"].items():
-                if enabled:  # If not empty
-                    print(f"{Colors.GREEN}  ✓ {cap}{Colors.END}")
-
-        # 2. List tools
-        tools_list_req = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/list"
-        }
-        print_section("SENDING: Tools List Request", tools_list_req)
-        await websocket.send(json.dumps(tools_list_req))
-        
-        response = await websocket.recv()
-        print_section("RECEIVED: Available Tools", response)
-        
-        # Extract tool info for demonstration
-        tools_data = json.loads(response)
-        if "result" in tools_data and len(tools_data["result"]) > 0:
-            print(f"\n{Colors.YELLOW}Available tools:{Colors.END}")
-            for tool in tools_data["result"]:
-                print(f"{Colors.GREEN}  ➤ {Colors.BOLD}{tool['name']}{Colors.END}: {tool['description']}")
-
-        # 3. Call add_numbers tool
-        tools_call_req = {
-            "jsonrpc": "2.0",
-            "id": 3,
-            "method": "tools/call",
-            "params": {
-                "name": "add_numbers",
-                "arguments": {"a": 5, "b": 7}
-            }
-        }
-        print_section("SENDING: Tool Call Request", tools_call_req)
-        await websocket.send(json.dumps(tools_call_req))
-        
-        response = await websocket.recv()
-        print_section("RECEIVED: Tool Call Result", response)
-        
-        # Extract result for demonstration
-        result_data = json.loads(response)
-        if "result" in result_data:
-            print(f"\n{Colors.YELLOW}Result of add_numbers(5, 7):{Colors.END}")
-            print(f"{Colors.GREEN}  = {Colors.BOLD}{result_data['result'].get('sum')}{Colors.END}")
-
-        # 4. List resources
-        resources_list_req = {
-            "jsonrpc": "2.0",
-            "id": 4,
-            "method": "resources/list"
-        }
-        print_section("SENDING: Resources List Request", resources_list_req)
-        await websocket.send(json.dumps(resources_list_req))
-        
-        response = await websocket.recv()
-        print_section("RECEIVED: Available Resources", response)
-        
-        # Extract resources for demonstration
-        resources_data = json.loads(response)
-        if "result" in resources_data and len(resources_data["result"]) > 0:
-            print(f"\n{Colors.YELLOW}Available resources:{Colors.END}")
-            for resource in resources_data["result"]:
-                print(f"{Colors.GREEN}  ➤ {Colors.BOLD}{resource['name']}{Colors.END} ({resource['uri']})")
-
-        # 5. Read example resource
-        resources_read_req = {
-            "jsonrpc": "2.0",
-            "id": 5,
-            "method": "resources/read",
-            "params": {"uris": ["file:///example.txt"]}
-        }
-        print_section("SENDING: Resource Read Request", resources_read_req)
-        await websocket.send(json.dumps(resources_read_req))
-        
-        response = await websocket.recv()
-        print_section("RECEIVED: Resource Content", response)
-        
-        # Extract content for demonstration
-        content_data = json.loads(response)
-        if "result" in content_data and "contents" in content_data["result"]:
-            for content in content_data["result"]["contents"]:
-                print(f"\n{Colors.YELLOW}Content of {content['uri']}:{Colors.END}")
-                print(f"{Colors.GREEN}  {Colors.BOLD}{content['text']}{Colors.END}")
-        
-        print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.END}")
-        print(f"{Colors.GREEN}{Colors.BOLD}MCP Demo Complete!{Colors.END}")
+    # Every run reuses the same connection instead of paying a new TCP + WebSocket handshake
+    session = await get_session(uri)
+    try:
+        for _ in range(runs):
+            await mcp_client(session)
+    finally:
+        await close_sessions()
 
 if __name__ == "__main__":
-    asyncio.run(mcp_client())
+    parser = argparse.ArgumentParser(description="Demo MCP client")
+    parser.add_argument("--runs", type=int, default=1, help="number of times to run the demo over one connection")
+    args = parser.parse_args()
+    run_event_loop(main(args.runs))
@@ -1,8 +1,43 @@
 import asyncio
 import websockets
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Union, Callable, Awaitable
 import sqlite3
+import os
+import logging
+import threading
+import concurrent.futures
+import collections
+import time
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib codec
+    orjson = None
+
+# JSON codec used on the wire. dumps() always returns bytes so responses can be
+# handed straight to websocket.send() without an extra str -> UTF-8 round trip.
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+
+    def dumps_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+    def dumps_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
+
+try:
+    from uvloop import run as run_event_loop
+except ImportError:  # uvloop is not available on Windows; use the stock asyncio loop
+    from asyncio import run as run_event_loop
+
+logger = logging.getLogger("mcp")
 
 # --- MCP Server Implementation ---
 # This server accepts WebSocket connections and speaks JSON-RPC 2.0.
@@ -21,8 +56,9 @@ CAPABILITIES = {
     "tools": {"listChanged": False}
 }
 
-# Example tool definition (add two numbers)
-TOOLS = [
+# Example tool definition (add two numbers). TOOLS and RESOURCES are tuples because they never
+# change at runtime; tools/list and resources/list answer from the bytes cached in *_LIST_BODY.
+TOOLS = (
     {
         "name": "add_numbers",
         "description": "Add two numbers and return the sum.",
@@ -46,278 +82,486 @@ TOOLS = [
             "required": []
         }
     }
-]
+)
+
+# Tool definitions indexed by name, for O(1) existence checks in tools/call
+TOOLS_BY_NAME = {tool["name"]: tool for tool in TOOLS}
 
 # Example resource definition (static text file)
-RESOURCES = [
+RESOURCES = (
     {
         "uri": "file:///example.txt",
         "name": "Example Text File",
         "description": "A static example text file.",
         "mimeType": "text/plain"
-    }
-]
+    },
+)
 
 # Resource content
 RESOURCE_CONTENTS = {
     "file:///example.txt": "Hello, this is the content of example.txt!"
 }
 
-# Initialize SQLite database and sample data if not exists
+# A handler's response: a JSON-RPC response dict, or bytes that are already serialized
+Response = Union[Dict[str, Any], bytes]
+# Method and tool handlers share one signature: (req_id, params) -> response
+Handler = Callable[[Any, Dict[str, Any]], Awaitable[Response]]
+
+def fill_id(body: bytes, req_id: Any) -> bytes:
+    """Wrap a pre-serialized result body in a JSON-RPC response without re-encoding it."""
+    return b'{"jsonrpc":"2.0","id":%s,"result":%s}' % (dumps(req_id), body)
+
+def fill_error(body: bytes, req_id: Any) -> bytes:
+    """Wrap a pre-serialized error object in a JSON-RPC error response."""
+    return b'{"jsonrpc":"2.0","id":%s,"error":%s}' % (dumps(req_id), body)
+
+def encode_response(response: Any) -> bytes:
+    """Serialize a response (or batch of responses), passing pre-serialized bytes through."""
+    if isinstance(response, bytes):
+        return response
+    if isinstance(response, list):
+        return b"[" + b",".join(encode_response(item) for item in response) + b"]"
+    return dumps(response)
+
+# These responses only vary by id, so they are serialized once at import
+INITIALIZE_BODY = dumps({
+    "protocolVersion": "2024-11-05",
+    "capabilities": CAPABILITIES,
+    "serverInfo": SERVER_INFO
+})
+TOOLS_LIST_BODY = dumps(TOOLS)
+RESOURCES_LIST_BODY = dumps(RESOURCES)
+PROMPTS_LIST_BODY = b"[]"
+# Shared default for requests without params; handlers only read params, never mutate them
+EMPTY_PARAMS: Dict[str, Any] = {}
+
+# Structural errors are constant too; the id-less form is a complete frame
+INVALID_REQUEST_BODY = dumps({"code": -32600, "message": "Invalid Request"})
+INVALID_PARAMS_BODY = dumps({"code": -32602, "message": "Invalid params: expected an object"})
+INVALID_REQUEST_ERROR = fill_error(INVALID_REQUEST_BODY, None)
+INTERNAL_ERROR_BODY = dumps({"code": -32603, "message": "Internal error"})
+# Each resource's entry in a resources/read "contents" list, serialized once
+RESOURCE_FRAMES = {
+    uri: dumps({"uri": uri, "mimeType": "text/plain", "text": text})
+    for uri, text in RESOURCE_CONTENTS.items()
+}
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'company.db')
+
+# Employee query. sqlite3 caches prepared statements keyed on the exact SQL
+# text, so always execute this constant (never an f-string) to keep hitting it.
+SQL_ALL = "SELECT id, name, department, email, hire_date FROM employees"
+
+# Seconds before the in-memory employee cache is reloaded from SQLite
+EMPLOYEE_CACHE_TTL = 300
+
+# Initialize SQLite database and sample data if not exists.
+# An existing database file is used as-is, so normal startups don't touch SQLite here.
 def init_sqlite_db():
-    import os
-    db_path = os.path.join(os.path.dirname(__file__), 'company.db')
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS employees (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        department TEXT NOT NULL,
-        email TEXT NOT NULL UNIQUE,
-        hire_date TEXT NOT NULL
-    )''')
-    # Insert sample data if table is empty
-    c.execute('SELECT COUNT(*) FROM employees')
-    if c.fetchone()[0] == 0:
-        c.executemany('''INSERT INTO employees (name, department, email, hire_date) VALUES (?, ?, ?, ?)''', [
+    if os.path.exists(DB_PATH):
+        return
+    conn = sqlite3.connect(DB_PATH)
+    # WAL lets the pooled readers run concurrently with any writer (persists in the file)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # Create and seed in one transaction so SQLite commits once
+    with conn:
+        conn.execute('BEGIN')
+        conn.execute('''CREATE TABLE employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            department TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            hire_date TEXT NOT NULL
+        )''')
+        conn.executemany('''INSERT INTO employees (name, department, email, hire_date) VALUES (?, ?, ?, ?)''', [
             ('Alice Smith', 'Engineering', 'alice.smith@example.com', '2020-01-15'),
             ('Bob Johnson', 'Marketing', 'bob.johnson@example.com', '2019-07-23'),
             ('Carol Lee', 'Sales', 'carol.lee@example.com', '2021-03-10'),
             ('David Kim', 'Engineering', 'david.kim@example.com', '2018-11-05'),
             ('Eva Brown', 'HR', 'eva.brown@example.com', '2022-06-01')
         ])
-    conn.commit()
     conn.close()
 
 init_sqlite_db()
 
+# Employee reloads run on a small worker pool so DB work overlaps with other
+# connections' I/O. Each worker keeps its own SQLite connection for its lifetime.
+DB_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="mcp-db")
+_db_local = threading.local()
+
+def get_db_conn():
+    """Return the calling thread's SQLite connection, opening it on first use."""
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache per connection
+        conn.execute('PRAGMA synchronous=NORMAL')  # safe with WAL; skips an fsync per commit
+        conn.execute('PRAGMA busy_timeout=5000')  # wait on a writer instead of failing with "database is locked"
+        _db_local.conn = conn
+    return conn
+
+def load_employees():
+    """Read all employees from SQLite.
+
+    Returns the list of employees, pre-serialized result bodies keyed by
+    lower-cased department, and the pre-serialized "all employees" result body.
+    """
+    cursor = get_db_conn().execute(SQL_ALL)
+    # Column names come from the cursor once per query; rows stay plain tuples
+    keys = [column[0] for column in cursor.description]
+    employees = [dict(zip(keys, row)) for row in cursor.fetchall()]
+    by_department = collections.defaultdict(list)
+    for employee in employees:
+        by_department[employee["department"].lower()].append(employee)
+    department_bodies = {
+        department: dumps({"employees": rows}) for department, rows in by_department.items()
+    }
+    return employees, department_bodies, dumps({"employees": employees})
+
+# Employee data is small and static once seeded, so employee_information is
+# served from memory and only goes back to SQLite when the cache expires.
+NO_EMPLOYEES_BODY = b'{"employees":[]}'
+_EMPLOYEES, _BY_DEPT, _ALL_EMPLOYEES_BODY = load_employees()
+_employees_loaded_at = time.monotonic()
+
+# Serializes reloads so concurrent callers don't each start one
+_employees_lock = asyncio.Lock()
+
+async def refresh_employees(max_age: float = 0) -> None:
+    """Reload the employee cache from SQLite on the DB pool.
+
+    With max_age, the reload is skipped when the cache is younger than that, so
+    callers that queued behind an in-flight reload reuse its result.
+    """
+    global _EMPLOYEES, _BY_DEPT, _ALL_EMPLOYEES_BODY, _employees_loaded_at
+    async with _employees_lock:
+        if max_age and time.monotonic() - _employees_loaded_at <= max_age:
+            return
+        _EMPLOYEES, _BY_DEPT, _ALL_EMPLOYEES_BODY = await asyncio.get_running_loop().run_in_executor(DB_POOL, load_employees)
+        _employees_loaded_at = time.monotonic()
+
+def encode_reply(response: Any) -> bytes:
+    """Encode a response frame at most once (bytes pass through as-is)."""
+    payload = encode_response(response)
+    # Only pay for the pretty-printed dump when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Sending response:\n%s", dumps_pretty(loads(payload)))
+    return payload
+
+# Messages from one client that may be processed concurrently before recv() pauses
+MAX_IN_FLIGHT = 64
+
 # WebSocket connection handler (note websockets.serve() expects this signature)
 async def handle_jsonrpc(websocket):
     client_info = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
-    print(f"Client connected from {client_info}!")
-    async for message in websocket:
+    logger.info("Client connected from %s", client_info)
+    # Each frame is processed in its own task, so a slow call (e.g. a cache refresh)
+    # doesn't hold up the next recv(). Replies still go out in the order the frames
+    # arrived: a single sender awaits the queued tasks one by one.
+    pending: asyncio.Queue = asyncio.Queue(MAX_IN_FLIGHT)
+    sender = asyncio.create_task(send_replies(websocket, pending, client_info))
+    try:
+        while True:
+            # Clients send binary frames; decode=False also hands text frames over as raw
+            # bytes, skipping websockets' UTF-8 decode since loads() accepts bytes directly
+            try:
+                message = await websocket.recv(decode=False)
+            except websockets.exceptions.ConnectionClosedOK:
+                break
+            # put() waits once MAX_IN_FLIGHT replies are pending (backpressure)
+            await pending.put(asyncio.create_task(process_message(message, client_info)))
+    finally:
+        # None tells the sender to stop once everything queued so far is answered
+        await pending.put(None)
+        await sender
+
+async def send_replies(websocket, pending: asyncio.Queue, client_info: str) -> None:
+    """Send each queued task's reply, in queue (arrival) order, until a None entry."""
+    while True:
+        task = await pending.get()
+        if task is None:
+            return
+        payload = await task
+        if payload is None:
+            continue
         try:
-            print(f"[DEBUG] Received message from {client_info}: {message}")
-            request = json.loads(message)
-            
-            # Log method and params
-            method = request.get("method")
-            params = request.get("params", {})
-            req_id = request.get("id")
-            print(f"[DEBUG] Processing {method} request (id={req_id}) with params: {json.dumps(params)}")
-            
-            # Process the request
-            response = await handle_request(request)
-            
-            if response is not None:
-                # Pretty print the response for logging
-                response_pretty = json.dumps(response, indent=2)
-                print(f"[DEBUG] Sending response for {method}:\n{response_pretty}")
-                await websocket.send(json.dumps(response))
-        except json.JSONDecodeError as je:
-            print(f"[DEBUG] JSON decode error: {je}")
-            # Send JSON-RPC error response for malformed JSON
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": None,  # We can't know the id if JSON parsing failed
-                "error": {"code": -32700, "message": f"Parse error: {str(je)}"}
-            }
-            print(f"[DEBUG] Sending parse error response")
-            await websocket.send(json.dumps(error_response))
-        except Exception as e:
-            print(f"[DEBUG] Error processing request: {e}")
-            # Send JSON-RPC error response
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": request.get("id") if 'request' in locals() else None,
-                "error": {"code": -32603, "message": str(e)}
-            }
-            print(f"[DEBUG] Sending error response: {error_response}")
-            await websocket.send(json.dumps(error_response))
-
-async def handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
-    method = request.get("method")
+            await websocket.send(payload)
+        except websockets.exceptions.ConnectionClosed:
+            # The client went away; keep draining so every task is still awaited
+            logger.debug("Dropped response for %s: connection closed", client_info)
+
+async def process_message(message: bytes, client_info: str) -> Union[bytes, None]:
+    """Decode, dispatch and encode the reply to one frame (a single request or a batch)."""
+    logger.debug("Received message from %s: %s", client_info, message)
+    try:
+        request = loads(message)
+    except json.JSONDecodeError as je:
+        logger.debug("JSON decode error: %s", je)
+        # Send JSON-RPC error response for malformed JSON
+        error_response = {
+            "jsonrpc": "2.0",
+            "id": None,  # We can't know the id if JSON parsing failed
+            "error": {"code": -32700, "message": f"Parse error: {str(je)}"}
+        }
+        return encode_reply(error_response)
+    try:
+        return await dispatch_message(request)
+    except Exception:
+        # Anything else (e.g. a response that fails to encode) would otherwise be lost;
+        # log it and answer with a generic error frame the client can match by id
+        logger.exception("Error handling message from %s", client_info)
+        req_id = request.get("id") if isinstance(request, dict) else None
+        return fill_error(INTERNAL_ERROR_BODY, req_id if isinstance(req_id, (str, int, float)) else None)
+
+async def dispatch_message(request: Any) -> Union[bytes, None]:
+    # JSON-RPC 2.0 batch: run every call concurrently and reply with one array
+    if isinstance(request, list):
+        logger.debug("Processing batch of %d requests", len(request))
+        response = await handle_batch(request)
+        return encode_reply(response) if response is not None else None
+
+    # Malformed requests are answered from cached error frames, without raising
+    error_response = validate_request(request)
+    if error_response is not None:
+        logger.debug("Rejected malformed request: %s", request)
+        return encode_reply(error_response)
+
+    logger.debug("Processing %s request (id=%s) with params: %s",
+                 request["method"], request.get("id"), request.get("params"))
+    try:
+        response = await handle_request(request)
+    except Exception as e:
+        logger.debug("Error processing request: %s", e)
+        # Send JSON-RPC error response
+        response = {
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "error": {"code": -32603, "message": str(e)}
+        }
+    return encode_reply(response) if response is not None else None
+
+def validate_request(request: Any) -> Union[bytes, None]:
+    """Cheap structural check of one request; returns an error frame, or None if it is well-formed."""
+    if not isinstance(request, dict):
+        return INVALID_REQUEST_ERROR
     req_id = request.get("id")
-    params = request.get("params", {})
+    if not isinstance(request.get("method"), str) or not isinstance(req_id, (str, int, float, type(None))):
+        return fill_error(INVALID_REQUEST_BODY, req_id if isinstance(req_id, (str, int, float)) else None)
+    # Every handler reads its params by name, so positional (list) params are rejected here
+    if not isinstance(request.get("params", EMPTY_PARAMS), dict):
+        return fill_error(INVALID_PARAMS_BODY, req_id)
+    return None
+
+async def handle_batch(requests: List[Any]) -> Any:
+    # An empty batch is itself an invalid request (JSON-RPC 2.0, section 6)
+    if not requests:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32600, "message": "Invalid Request: empty batch"}
+        }
+    responses = await asyncio.gather(*(handle_batch_item(request) for request in requests))
+    return [response for response in responses if response is not None] or None
+
+async def handle_batch_item(request: Any) -> Response:
+    # Each batch entry fails on its own without taking down the rest of the batch
+    error_response = validate_request(request)
+    if error_response is not None:
+        return error_response
+    try:
+        return await handle_request(request)
+    except Exception as e:
+        logger.debug("Error processing batch entry: %s", e)
+        return {
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "error": {"code": -32603, "message": str(e)}
+        }
+
+# --- MCP handshake ---
+async def _initialize(req_id: Any, params: Dict[str, Any]) -> Response:
+    return fill_id(INITIALIZE_BODY, req_id)
 
-    # --- MCP handshake ---
-    if method == "initialize":
+# --- Tools discovery ---
+async def _tools_list(req_id: Any, params: Dict[str, Any]) -> Response:
+    return fill_id(TOOLS_LIST_BODY, req_id)
+
+# --- Tools invocation ---
+async def _add_numbers(req_id: Any, arguments: Dict[str, Any]) -> Response:
+    a = arguments.get("a")
+    b = arguments.get("b")
+    if a is None or b is None:
+        logger.warning("Missing arguments for add_numbers: a=%s, b=%s", a, b)
         return {
             "jsonrpc": "2.0",
             "id": req_id,
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": CAPABILITIES,
-                "serverInfo": SERVER_INFO
-            }
+            "error": {"code": -32602, "message": f"Missing required arguments for add_numbers: a={a}, b={b}"}
         }
-    # --- Tools discovery ---
-    elif method == "tools/list":
+    
+    # Validate types
+    if not (isinstance(a, (int, float)) and isinstance(b, (int, float))):
+        logger.warning("Invalid argument types for add_numbers: a=%s, b=%s", type(a), type(b))
         return {
             "jsonrpc": "2.0",
             "id": req_id,
-            "result": TOOLS
+            "error": {"code": -32602, "message": f"Arguments must be numbers: a={type(a)}, b={type(b)}"}
         }
-    # --- Tools invocation ---
-    elif method == "tools/call":
-        name = params.get("name")
-        arguments = params.get("arguments", {})
-        print(f"[DEBUG] Calling tool '{name}' with arguments: {json.dumps(arguments)}")
         
-        # Check if the tool exists
-        tool_exists = any(tool["name"] == name for tool in TOOLS)
-        if not tool_exists:
-            print(f"[ERROR] Unknown tool: {name}")
-            return {
-                "jsonrpc": "2.0",
-                "id": req_id,
-                "error": {"code": -32602, "message": f"Unknown tool: {name}"}
-            }
-            
-        try:
-            if name == "add_numbers":
-                a = arguments.get("a")
-                b = arguments.get("b")
-                if a is None or b is None:
-                    print(f"[ERROR] Missing arguments for add_numbers: a={a}, b={b}")
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": req_id,
-                        "error": {"code": -32602, "message": f"Missing required arguments for add_numbers: a={a}, b={b}"}
-                    }
-                
-                # Validate types
-                if not (isinstance(a, (int, float)) and isinstance(b, (int, float))):
-                    print(f"[ERROR] Invalid argument types for add_numbers: a={type(a)}, b={type(b)}")
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": req_id,
-                        "error": {"code": -32602, "message": f"Arguments must be numbers: a={type(a)}, b={type(b)}"}
-                    }
-                    
-                result = {"sum": a + b}
-                print(f"[DEBUG] add_numbers result: {result}")
-                return {
-                    "jsonrpc": "2.0",
-                    "id": req_id,
-                    "result": result
-                }
-                
-            elif name == "employee_information":
-                # Query employees from SQLite database, optionally filter by department
-                import os
-                db_path = os.path.join(os.path.dirname(__file__), 'company.db')
-                
-                if not os.path.exists(db_path):
-                    print(f"[ERROR] Database file not found: {db_path}")
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": req_id,
-                        "error": {"code": -32603, "message": "Database file not found"}
-                    }
-                
-                try:
-                    conn = sqlite3.connect(db_path)
-                    c = conn.cursor()
-                    department = arguments.get("department")
-                    
-                    if department:
-                        print(f"[DEBUG] Filtering employees by department: {department}")
-                        # Use case-insensitive search with LOWER() function
-                        c.execute("SELECT id, name, department, email, hire_date FROM employees WHERE LOWER(department) = LOWER(?)", (department,))
-                    else:
-                        print(f"[DEBUG] Getting all employees")
-                        c.execute("SELECT id, name, department, email, hire_date FROM employees")
-                        
-                    rows = c.fetchall()
-                    conn.close()
-                    
-                    employees = [
-                        {"id": row[0], "name": row[1], "department": row[2], "email": row[3], "hire_date": row[4]}
-                        for row in rows
-                    ]
-                    
-                    print(f"[DEBUG] Found {len(employees)} employees")
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": req_id,
-                        "result": {"employees": employees}
-                    }
-                except sqlite3.Error as e:
-                    print(f"[ERROR] Database error: {e}")
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": req_id,
-                        "error": {"code": -32603, "message": f"Database error: {str(e)}"}
-                    }
-            else:
-                # This shouldn't happen due to the check at the beginning, but just in case
-                return {
-                    "jsonrpc": "2.0",
-                    "id": req_id,
-                    "error": {"code": -32602, "message": f"Unknown tool: {name}"}
-                }
-        except Exception as e:
-            print(f"[ERROR] Exception while calling tool {name}: {e}")
-            return {
-                "jsonrpc": "2.0",
-                "id": req_id,
-                "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
-            }
-    # --- Resources discovery ---
-    elif method == "resources/list":
+    total = a + b
+    logger.debug("add_numbers result: %s", total)
+    return fill_id(b'{"sum":%s}' % dumps(total), req_id)
+
+async def _employee_information(req_id: Any, arguments: Dict[str, Any]) -> Response:
+    # Serve employees from the in-memory cache, optionally filtered by department
+    try:
+        # A read that arrives while a reload is in flight (e.g. right after a
+        # refresh_employees call on the same connection) waits for its result
+        if _employees_lock.locked() or time.monotonic() - _employees_loaded_at > EMPLOYEE_CACHE_TTL:
+            await refresh_employees(max_age=EMPLOYEE_CACHE_TTL)
+        department = arguments.get("department")
+        
+        if not department:
+            # The unfiltered list is the largest payload; it is serialized once per cache load
+            logger.debug("Getting all %d employees", len(_EMPLOYEES))
+            return fill_id(_ALL_EMPLOYEES_BODY, req_id)
+
+        logger.debug("Filtering employees by department: %s", department)
+        # str() keeps the old SQL LOWER(?) behaviour for non-string values: they match nothing
+        return fill_id(_BY_DEPT.get(str(department).lower(), NO_EMPLOYEES_BODY), req_id)
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", e)
         return {
             "jsonrpc": "2.0",
             "id": req_id,
-            "result": RESOURCES
+            "error": {"code": -32603, "message": f"Database error: {str(e)}"}
         }
-    # --- Resources read ---
-    elif method == "resources/read":
-        uris = params.get("uris", [])
-        contents = []
-        for uri in uris:
-            if uri in RESOURCE_CONTENTS:
-                contents.append({
-                    "uri": uri,
-                    "mimeType": "text/plain",
-                    "text": RESOURCE_CONTENTS[uri]
-                })
+
+# Tool name -> implementation; every entry in TOOLS must have one
+TOOL_HANDLERS: Dict[str, Handler] = {
+    "add_numbers": _add_numbers,
+    "employee_information": _employee_information
+}
+
+async def _tools_call(req_id: Any, params: Dict[str, Any]) -> Response:
+    name = params.get("name")
+    arguments = params.get("arguments", {})
+    logger.debug("Calling tool '%s' with arguments: %s", name, arguments)
+    
+    # Check if the tool exists
+    if name not in TOOLS_BY_NAME:
+        logger.warning("Unknown tool: %s", name)
         return {
             "jsonrpc": "2.0",
             "id": req_id,
-            "result": {"contents": contents}
+            "error": {"code": -32602, "message": f"Unknown tool: {name}"}
         }
-    # --- Prompts discovery (empty for now) ---
-    elif method == "prompts/list":
+        
+    try:
+        return await TOOL_HANDLERS[name](req_id, arguments)
+    except Exception as e:
+        logger.error("Exception while calling tool %s: %s", name, e)
         return {
             "jsonrpc": "2.0",
             "id": req_id,
-            "result": []
+            "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
         }
-    # --- Prompts get (not implemented) ---
-    elif method == "prompts/get":
+
+# --- Resources discovery ---
+async def _resources_list(req_id: Any, params: Dict[str, Any]) -> Response:
+    return fill_id(RESOURCES_LIST_BODY, req_id)
+
+# --- Resources read ---
+# Caps concurrent resource reads once backends do real I/O (files, HTTP)
+RESOURCE_READ_LIMIT = asyncio.Semaphore(16)
+
+async def read_resource(uri: str) -> Union[bytes, None]:
+    """Return the serialized contents entry for uri, or None if it is unknown."""
+    async with RESOURCE_READ_LIMIT:
+        return RESOURCE_FRAMES.get(uri)
+
+async def _resources_read(req_id: Any, params: Dict[str, Any]) -> Response:
+    uris = params.get("uris", [])
+    if len(uris) == 1:
+        # The common single-URI read skips the task overhead of gather()
+        frames = [await read_resource(uris[0])]
+    else:
+        frames = await asyncio.gather(*(read_resource(uri) for uri in uris))
+    return fill_id(b'{"contents":[%s]}' % b",".join(frame for frame in frames if frame is not None), req_id)
+
+# --- Admin: reload the employee cache after the database changes ---
+async def _refresh_employees(req_id: Any, params: Dict[str, Any]) -> Response:
+    try:
+        await refresh_employees()
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", e)
         return {
             "jsonrpc": "2.0",
             "id": req_id,
-            "error": {"code": -32601, "message": "No prompts implemented."}
+            "error": {"code": -32603, "message": f"Database error: {str(e)}"}
         }
-    else:
+    return {
+        "jsonrpc": "2.0",
+        "id": req_id,
+        "result": {"count": len(_EMPLOYEES)}
+    }
+
+# --- Prompts discovery (empty for now) ---
+async def _prompts_list(req_id: Any, params: Dict[str, Any]) -> Response:
+    return fill_id(PROMPTS_LIST_BODY, req_id)
+
+# --- Prompts get (not implemented) ---
+async def _prompts_get(req_id: Any, params: Dict[str, Any]) -> Response:
+    return {
+        "jsonrpc": "2.0",
+        "id": req_id,
+        "error": {"code": -32601, "message": "No prompts implemented."}
+    }
+
+# JSON-RPC method table: one dict lookup per request instead of an if/elif chain
+METHODS: Dict[str, Handler] = {
+    "initialize": _initialize,
+    "tools/list": _tools_list,
+    "tools/call": _tools_call,
+    "resources/list": _resources_list,
+    "resources/read": _resources_read,
+    "prompts/list": _prompts_list,
+    "prompts/get": _prompts_get,
+    "refresh_employees": _refresh_employees
+}
+
+async def handle_request(request: Dict[str, Any]) -> Response:
+    # validate_request() has already checked the shape, so "method" is present
+    method = request["method"]
+    req_id = request.get("id")
+    params = request.get("params") or EMPTY_PARAMS
+
+    handler = METHODS.get(method)
+    if handler is None:
         return {
             "jsonrpc": "2.0",
             "id": req_id,
             "error": {"code": -32601, "message": f"Unknown method: {method}"}
         }
+    return await handler(req_id, params)
 
 async def main():
     print("Starting MCP server on ws://localhost:8765 ...")
-    # Modern websockets library uses single-argument handlers (no path)
-    async with websockets.serve(handle_jsonrpc, "localhost", 8765):
+    # Modern websockets library uses single-argument handlers (no path).
+    # JSON-RPC frames are small, so permessage-deflate costs more CPU than it saves.
+    # Set compression="deflate" here and in the clients if large resources are added.
+    # max_size (1 MiB) and the 20 s keepalive pings restate websockets' defaults; they are
+    # spelled out so the frame limit and idle-client timeout are visible here.
+    async with websockets.serve(handle_jsonrpc, "localhost", 8765, compression=None, max_size=2**20,
+                                ping_interval=20, ping_timeout=20):
         print("Server started successfully!")
         await asyncio.Future()  # run forever
 
 if __name__ == "__main__":
+    # Per-message logging is at DEBUG; set MCP_LOG_LEVEL=DEBUG to see it
+    logging.basicConfig(format="[%(levelname)s] %(message)s")
+    logger.setLevel(os.environ.get("MCP_LOG_LEVEL", "WARNING").upper())
     try:
-        asyncio.run(main())
+        run_event_loop(main())
     except KeyboardInterrupt:
         print("Server stopped by user")
     except Exception as e:
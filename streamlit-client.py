@@ -4,57 +4,129 @@ import os
 import websockets
 import json
 import asyncio
+import sqlite3
+import threading
+import time
 
-# Define function to discover MCP tools
-async def discover_mcp_tools():
-    uri = "ws://localhost:8765"
-    async with websockets.connect(uri) as websocket:
-        # 1. Send initialize handshake
-        initialize_req = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {}
-        }
-        await websocket.send(json.dumps(initialize_req))
-        await websocket.recv()  # Ignore handshake response for now
-
-        # 2. Send tools/list request
-        tools_list_req = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/list",
-            "params": {}
-        }
-        await websocket.send(json.dumps(tools_list_req))
-        tools_response = await websocket.recv()
-        tools = json.loads(tools_response)["result"]
-        return tools
-        
-async def discover_mcp_resources():
-    uri = "ws://localhost:8765"
-    async with websockets.connect(uri) as websocket:
-        # 1. Send initialize handshake
-        initialize_req = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {}
-        }
-        await websocket.send(json.dumps(initialize_req))
-        await websocket.recv()  # Ignore handshake response for now
-
-        # 2. Send resources/list request
-        resources_list_req = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "resources/list",
-            "params": {}
-        }
-        await websocket.send(json.dumps(resources_list_req))
-        resources_response = await websocket.recv()
-        resources = json.loads(resources_response)["result"]
-        return resources
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib codec
+    orjson = None
+
+# JSON codec used on the MCP websocket; dumps() always returns bytes.
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+
+    def dumps_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+else:
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+    def dumps_pretty(obj):
+        return json.dumps(obj, indent=2)
+
+async def send_json(websocket, obj):
+    """Encode obj once and send it; the bytes from dumps() go out without a str round trip"""
+    await websocket.send(dumps(obj))
+
+MCP_SERVER_URL = "ws://localhost:8765"
+
+# Streamed answers are redrawn every STREAM_FLUSH_TOKENS tokens, or sooner once STREAM_FLUSH_SECONDS pass
+STREAM_FLUSH_TOKENS = 8
+STREAM_FLUSH_SECONDS = 0.05
+
+class MCPClient:
+    """One MCP websocket session, shared across Streamlit reruns via get_client()."""
+
+    def __init__(self, url):
+        self.url = url
+        self.websocket = None
+        self.next_id = 0
+        # Every session shares this one socket, so each request/response pair must
+        # finish before the next request goes out or responses could be crossed
+        self.lock = asyncio.Lock()
+
+    async def connect(self):
+        # Messages are small JSON-RPC frames, so skip permessage-deflate. Keepalive
+        # pings notice a dead server while the cached connection sits idle.
+        self.websocket = await websockets.connect(self.url, compression=None, ping_interval=20)
+        await self._roundtrip(self._request("initialize", {"protocolVersion": "2024-11-05", "capabilities": {}}))
+
+    def _request(self, method, params=None):
+        self.next_id += 1
+        return {"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params or {}}
+
+    async def _roundtrip(self, payload):
+        # Callers must hold self.lock
+        await send_json(self.websocket, payload)
+        return loads(await self.websocket.recv(decode=False))
+
+    async def _send_payload(self, payload):
+        async with self.lock:
+            if self.websocket is None:
+                await self.connect()
+            try:
+                return await self._roundtrip(payload)
+            except websockets.exceptions.ConnectionClosed:
+                # The server went away (e.g. it was restarted); reconnect once and retry
+                await self.connect()
+                return await self._roundtrip(payload)
+
+    async def send(self, method, params=None):
+        """Send one JSON-RPC request and return the decoded response, connecting on first use."""
+        return await self._send_payload(self._request(method, params))
+
+    async def send_batch(self, calls):
+        """Send several (method, params) calls as one JSON-RPC batch; returns the responses in call order."""
+        requests = [self._request(method, params) for method, params in calls]
+        responses = await self._send_payload(requests)
+        # The server may answer a batch in any order, so match responses back up by id
+        by_id = {response.get("id"): response for response in responses}
+        return [by_id.get(request["id"], {}) for request in requests]
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+            self.websocket = None
+
+@st.cache_resource
+def get_event_loop():
+    """The event loop that owns the cached MCP connection; it must outlive reruns too.
+
+    It runs forever on a daemon thread, so keepalive pings keep flowing between
+    reruns and several browser sessions can submit work to it at once.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="mcp-event-loop", daemon=True).start()
+    return loop
+
+@st.cache_resource
+def get_client(url):
+    return MCPClient(url)
+
+DB_PATH = os.path.join("server", "company.db")
+EMPLOYEES_TABLE_SQL = (
+    'SELECT id AS "ID", name AS "Name", department AS "Department", '
+    'email AS "Email", hire_date AS "Hire Date" FROM employees'
+)
+
+@st.cache_resource
+def get_db():
+    """Read-only SQLite connection reused across reruns (and script threads)."""
+    return sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False)
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+# Discover MCP tools and resources in a single round trip
+async def discover_all(client):
+    tools_response, resources_response = await client.send_batch([("tools/list", None), ("resources/list", None)])
+    return tools_response["result"], resources_response["result"]
 
 def mcp_tool_to_openai_function(tool):
     """Convert an MCP tool definition to OpenAI function-calling format."""
@@ -62,7 +134,8 @@ def mcp_tool_to_openai_function(tool):
     params_schema = tool["inputSchema"].copy()  # Make a copy to avoid modifying the original
     
     # Add debug print to inspect the schema structure
-    print(f"Converting tool {tool['name']} with schema: {json.dumps(params_schema)}")
+    if st.session_state.get("debug"):
+        print(f"Converting tool {tool['name']} with schema: {dumps(params_schema).decode()}")
     
     # Ensure schema has all required fields for OpenAI
     if "type" not in params_schema:
@@ -110,25 +183,39 @@ if st.session_state['mcp_tools']:
     st.sidebar.success(f"Connected to MCP server with {len(st.session_state['mcp_tools'])} tools")
     for tool in st.session_state['mcp_tools']:
         st.sidebar.write(f"- {tool['name']}")
+    if st.sidebar.button("Disconnect from MCP Server"):
+        run_async(get_client(MCP_SERVER_URL).close())
+        get_client.clear()
+        st.session_state['mcp_tools'] = []
+        st.session_state['mcp_resources'] = []
+        st.session_state['openai_functions'] = []
+        st.rerun()
 else:
     st.sidebar.warning("Not connected to MCP server. Click 'Discover MCP Server' to connect.")
 
+# The [DEBUG] dumps below re-render whole payloads on every request, so they are opt-in
+debug = st.sidebar.checkbox("Show debug output", key="debug")
+
 # Button to discover tools and resources
 if st.button("Discover MCP Server"):
     with st.spinner("Discovering tools and resources from MCP server..."):
         try:
-            tools = asyncio.run(discover_mcp_tools())
-            # Debug: print the raw tools response
-            st.write("[DEBUG] Raw tools response from MCP server:")
-            st.json(tools)
+            tools, resources = run_async(discover_all(get_client(MCP_SERVER_URL)))
+            if debug:
+                st.write("[DEBUG] Raw tools response from MCP server:")
+                st.json(tools)
             # Only store if valid list
             if not isinstance(tools, list):
                 st.error(f"Error: MCP server did not return a list of tools. Got: {tools}")
             else:
-                # Convert MCP tools to OpenAI functions
+                # Convert and validate MCP tools as OpenAI functions once, here, so that
+                # submitting a prompt can pass st.session_state['openai_functions'] as-is
                 openai_functions = []
                 for tool in tools:
                     try:
+                        if not isinstance(tool.get("inputSchema"), dict):
+                            st.warning(f"Function {tool['name']} has invalid parameters schema type: {type(tool.get('inputSchema'))}")
+                            continue
                         openai_function = mcp_tool_to_openai_function(tool)
                         # Verify the function is valid
                         if all(k in openai_function for k in ["name", "description", "parameters"]):
@@ -140,8 +227,6 @@ if st.button("Discover MCP Server"):
                 
                 st.session_state['mcp_tools'] = tools
                 st.session_state['openai_functions'] = openai_functions
-            # Discover resources
-            resources = asyncio.run(discover_mcp_resources())
             st.session_state['mcp_resources'] = resources
             st.success("Discovered tools and resources:")
             st.subheader("Tools")
@@ -154,25 +239,16 @@ if st.button("Discover MCP Server"):
 
 # Button to show employees table
 if st.button("Show Employees Table"):
-    import sqlite3
-    import os
-    db_path = os.path.join("server", "company.db")
-    if not os.path.exists(db_path):
-        st.error(f"Database not found at {db_path}. Please ensure the server has initialized the database.")
+    if not os.path.exists(DB_PATH):
+        st.error(f"Database not found at {DB_PATH}. Please ensure the server has initialized the database.")
     else:
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
         try:
-            c.execute("SELECT id, name, department, email, hire_date FROM employees")
-            rows = c.fetchall()
             import pandas as pd
-            df = pd.DataFrame(rows, columns=["ID", "Name", "Department", "Email", "Hire Date"])
+            df = pd.read_sql_query(EMPLOYEES_TABLE_SQL, get_db())
             st.subheader("Employees Table")
             st.dataframe(df)
         except sqlite3.OperationalError as e:
             st.error(f"Database error: {e}")
-        finally:
-            conn.close()
 
 if submitted:
     if not prompt.strip():
@@ -180,53 +256,16 @@ if submitted:
     else:
         with st.spinner("Waiting for OpenAI response..."):
             try:
-                openai_functions = st.session_state.get('openai_functions', None)
-                st.write("[DEBUG] Functions sent to LLM:")
-                st.json(openai_functions)
-                
-                # Validate the functions before sending them to OpenAI
-                valid_functions = []
-                if openai_functions:
-                    for func in openai_functions:
-                        try:
-                            # Make sure each function has required fields
-                            if all(k in func for k in ["name", "description", "parameters"]):
-                                # Create a copy to avoid modifying the original
-                                validated_func = func.copy()
-                                validated_params = validated_func["parameters"].copy()
-                                
-                                # Validate that parameters is a valid JSON schema
-                                if isinstance(validated_params, dict):
-                                    # Add type if missing
-                                    if "type" not in validated_params:
-                                        validated_params["type"] = "object"
-                                        
-                                    # Ensure properties exists
-                                    if "properties" not in validated_params:
-                                        validated_params["properties"] = {}
-                                        
-                                    # Remove any src field
-                                    if "src" in validated_params:
-                                        del validated_params["src"]
-                                        
-                                    # Update the parameters in the function
-                                    validated_func["parameters"] = validated_params
-                                    valid_functions.append(validated_func)
-                                    st.write(f"[DEBUG] Validated function: {validated_func['name']}")
-                                else:
-                                    st.warning(f"Function {func['name']} has invalid parameters schema type: {type(func['parameters'])}")
-                            else:
-                                missing = [k for k in ["name", "description", "parameters"] if k not in func]
-                                st.warning(f"Function missing required fields: {missing}")
-                        except Exception as e:
-                            st.warning(f"Error validating function {func.get('name', 'unknown')}: {e}")
+                # Already converted and validated once, when the server was discovered
+                valid_functions = st.session_state.get('openai_functions') or []
                 
                 # Try to serialize to JSON and print
-                try:
-                    st.write("[DEBUG] JSON serialization of validated functions:")
-                    st.code(json.dumps(valid_functions, indent=2))
-                except Exception as ser_e:
-                    st.error(f"[DEBUG] JSON serialization error: {ser_e}")
+                if debug:
+                    try:
+                        st.write("[DEBUG] Functions sent to LLM:")
+                        st.code(dumps_pretty(valid_functions))
+                    except Exception as ser_e:
+                        st.error(f"[DEBUG] JSON serialization error: {ser_e}")
                 
                 kwargs = {
                     'model': "gpt-4o",
@@ -239,80 +278,55 @@ if submitted:
                 # Check for function_call in the response
                 message = response.choices[0].message
                 if hasattr(message, 'function_call') and message.function_call:
-                    st.write("[DEBUG] LLM requested function call:")
-                    st.json({
-                        'name': message.function_call.name,
-                        'arguments': message.function_call.arguments
-                    })
+                    if debug:
+                        st.write("[DEBUG] LLM requested function call:")
+                        st.json({
+                            'name': message.function_call.name,
+                            'arguments': message.function_call.arguments
+                        })
                     # Call the MCP server with the requested function
-                    import ast
                     func_name = message.function_call.name
-                    try:
-                        func_args = json.loads(message.function_call.arguments)
-                    except Exception:
-                        # Sometimes arguments may be a stringified dict, try ast.literal_eval
-                        func_args = ast.literal_eval(message.function_call.arguments)
-                    async def call_mcp_tool(name, arguments):
-                        uri = "ws://localhost:8765"
+                    # OpenAI sends the arguments as a JSON string; a parse error is reported below.
+                    # The original string is echoed back in the follow-up, so it is never re-encoded.
+                    func_args_str = message.function_call.arguments
+                    func_args = loads(func_args_str)
+                    # Runs on the script thread: only the client.send() coroutine goes to the
+                    # background loop, since st.* calls need this thread's script context
+                    def call_mcp_tool(client, name, arguments):
                         try:
-                            st.write(f"[DEBUG] Connecting to MCP server at {uri} to call tool: {name}")
-                            async with websockets.connect(uri) as websocket:
-                                # 1. Send initialize handshake
-                                initialize_req = {
-                                    "jsonrpc": "2.0",
-                                    "id": 1,
-                                    "method": "initialize",
-                                    "params": {
-                                        "protocolVersion": "2024-11-05",
-                                        "capabilities": {}
-                                    }
-                                }
-                                await websocket.send(json.dumps(initialize_req))
-                                handshake_response = await websocket.recv()
-                                # Log handshake response for debugging
-                                handshake_data = json.loads(handshake_response)
-                                st.write("[DEBUG] MCP handshake successful:")
-                                st.json(handshake_data)
-                                
-                                # 2. Call the tool
-                                tools_call_req = {
-                                    "jsonrpc": "2.0",
-                                    "id": 2,
-                                    "method": "tools/call",
-                                    "params": {
-                                        "name": name,
-                                        "arguments": arguments
-                                    }
-                                }
-                                st.write(f"[DEBUG] Sending tool call request for {name}:")
-                                st.json(tools_call_req)
-                                
-                                await websocket.send(json.dumps(tools_call_req))
-                                tools_call_response = await websocket.recv()
-                                
-                                try:
-                                    response_data = json.loads(tools_call_response)
-                                    st.write(f"[DEBUG] Received tool call response:")
-                                    st.json(response_data)
-                                    
-                                    # Check for errors in the response
-                                    if "error" in response_data:
-                                        st.error(f"MCP server returned an error: {response_data['error']['message']}")
-                                        return {"result": {"error": response_data["error"]}}
-                                    
-                                    return response_data
-                                except json.JSONDecodeError as je:
-                                    st.error(f"Failed to decode MCP response: {tools_call_response}")
-                                    return {"result": {"error": f"JSON decode error: {str(je)}"}}
-                        except websockets.exceptions.ConnectionError as ce:
+                            tools_call_params = {
+                                "name": name,
+                                "arguments": arguments
+                            }
+                            if debug:
+                                st.write(f"[DEBUG] Calling tool on MCP server at {client.url}: {name}")
+                                st.json(tools_call_params)
+                            
+                            # The cached client already performed the initialize handshake
+                            response_data = run_async(client.send("tools/call", tools_call_params))
+                            if debug:
+                                st.write(f"[DEBUG] Received tool call response:")
+                                st.json(response_data)
+                            
+                            # Check for errors in the response
+                            if "error" in response_data:
+                                st.error(f"MCP server returned an error: {response_data['error']['message']}")
+                                return {"result": {"error": response_data["error"]}}
+                            
+                            return response_data
+                        except json.JSONDecodeError as je:
+                            st.error(f"Failed to decode MCP response: {je}")
+                            return {"result": {"error": f"JSON decode error: {str(je)}"}}
+                        except OSError as ce:
                             st.error(f"Failed to connect to MCP server: {ce}")
                             return {"result": {"error": f"Connection error: {str(ce)}"}}
                         except Exception as e:
                             st.error(f"Error in call_mcp_tool: {e}")
                             return {"result": {"error": str(e)}}
-                    mcp_result = asyncio.run(call_mcp_tool(func_name, func_args))
-                    st.write("[DEBUG] MCP tool call result:")
-                    st.json(mcp_result)
+                    mcp_result = call_mcp_tool(get_client(MCP_SERVER_URL), func_name, func_args)
+                    if debug:
+                        st.write("[DEBUG] MCP tool call result:")
+                        st.json(mcp_result)
                     # Send the function result back to the LLM as a new message
                     function_response = mcp_result.get('result')
                     
@@ -324,12 +338,13 @@ if submitted:
                     # Format the response to be sent as a function response message
                     function_response_str = None
                     try:
-                        function_response_str = json.dumps(function_response)
-                        st.write("[DEBUG] Formatted function result for LLM:")
-                        st.code(function_response_str, language="json")
+                        function_response_str = dumps(function_response).decode()
+                        if debug:
+                            st.write("[DEBUG] Formatted function result for LLM:")
+                            st.code(function_response_str, language="json")
                     except TypeError as te:
                         st.error(f"Failed to serialize function response: {te}")
-                        function_response_str = json.dumps({"error": f"Failed to serialize result: {str(te)}"})
+                        function_response_str = dumps({"error": f"Failed to serialize result: {str(te)}"}).decode()
                     
                     followup_kwargs = {
                         'model': "gpt-4o",
@@ -337,21 +352,29 @@ if submitted:
                             {"role": "user", "content": prompt},
                             {"role": "assistant", "content": None, "function_call": {
                                 "name": func_name,
-                                "arguments": json.dumps(func_args)
+                                "arguments": func_args_str
                             }},
                             {"role": "function", "name": func_name, "content": function_response_str}
                         ],
                         'stream': True
                     }
                     
-                    st.write("[DEBUG] Sending function result back to OpenAI for processing")
+                    if debug:
+                        st.write("[DEBUG] Sending function result back to OpenAI for processing")
                     followup_response = openai.chat.completions.create(**followup_kwargs)
-                    answer = ""
+                    parts = []
                     response_placeholder = st.empty()
+                    # Re-rendering the growing answer on every token is quadratic, so batch redraws
+                    last_flush = time.monotonic()
                     for chunk in followup_response:
                         if hasattr(chunk.choices[0].delta, 'content') and chunk.choices[0].delta.content:
-                            answer += chunk.choices[0].delta.content
-                            response_placeholder.markdown(answer)
+                            parts.append(chunk.choices[0].delta.content)
+                            now = time.monotonic()
+                            if len(parts) % STREAM_FLUSH_TOKENS == 0 or now - last_flush > STREAM_FLUSH_SECONDS:
+                                response_placeholder.markdown("".join(parts))
+                                last_flush = now
+                    answer = "".join(parts)
+                    response_placeholder.markdown(answer)
                 else:
                     # No function call, just show the LLM's answer
                     answer = message.content